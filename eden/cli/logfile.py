@@ -6,13 +6,42 @@
 
 import asyncio
 import contextlib
+import errno
 import io
+import os
 import pathlib
 import typing
 
 
 _BinaryIO = typing.Union[typing.IO[bytes], io.BufferedIOBase]
 
+# Maximum number of bytes to read from a followed file at a time.
+_CHUNK_SIZE = 64 * 1024
+
+# Size of the read buffer of files opened by follow_log_file. Each followed file
+# holds its own buffer, so this costs up to 1 MiB of memory per followed file,
+# but lets a large backlog be read with few read syscalls.
+_FOLLOW_BUFFER_SIZE = 1024 * 1024
+
+# How often to check followed files for new data when they can't be watched.
+_POLL_INTERVAL_SECONDS = 0.1
+
+# How often to check watched files for new data even if no change was
+# reported. This bounds how long data written before the watch was set up can
+# go unnoticed.
+_WATCH_TIMEOUT_MILLISECONDS = 1000
+
+# Errors from os.sendfile which mean the kernel can't copy between the two
+# files (e.g. the output was opened with O_APPEND, or the platform requires the
+# output to be a socket). LogForwarder falls back to read() and write() for
+# these.
+_SENDFILE_UNSUPPORTED_ERRNOS = {
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.ENOTSOCK,
+    errno.EOPNOTSUPP,
+}
+
 
 @contextlib.contextmanager
 def forward_log_file(
@@ -25,30 +54,110 @@ def forward_log_file(
 class LogForwarder:
     __follower: "LogFollower"
     __output_file: _BinaryIO
+    # Set if data can be copied to the output file with os.sendfile.
+    __output_fd: typing.Optional[int]
 
     def __init__(self, follower: "LogFollower", output_file: _BinaryIO) -> None:
         super().__init__()
         self.__follower = follower
         self.__output_file = output_file
+        self.__output_fd = None
+        if hasattr(os, "sendfile"):
+            try:
+                follower.fileno()
+                self.__output_fd = output_file.fileno()
+            except (AttributeError, OSError, ValueError):
+                pass
 
     def poll(self) -> None:
-        # pyre-fixme[29]: `Union[Callable[[Union[bytearray, bytes]], int],
-        #  Callable[[bytes], int]]` is not a function.
-        self.__output_file.write(self.__follower.poll())
+        output_fd = self.__output_fd
+        if output_fd is not None:
+            # Data written to output_file by others must land before ours.
+            self.__output_file.flush()
+            try:
+                self.__follower.copy_to_fd(output_fd)
+                return
+            except OSError as e:
+                if e.errno not in _SENDFILE_UNSUPPORTED_ERRNOS:
+                    raise
+                self.__output_fd = None
+
+        for chunk in self.__follower.poll_chunks():
+            # pyre-fixme[29]: `Union[Callable[[Union[bytearray, bytes]], int],
+            #  Callable[[bytes], int]]` is not a function.
+            self.__output_file.write(chunk)
         self.__output_file.flush()
 
     async def poll_forever_async(self) -> typing.NoReturn:
         while True:
             self.poll()
-            await asyncio.sleep(0.1)
+            await asyncio.sleep(_POLL_INTERVAL_SECONDS)
 
 
 @contextlib.contextmanager
 def follow_log_file(file_path: pathlib.Path) -> typing.Iterator["LogFollower"]:
-    with open(file_path, "rb") as file:
+    with open(file_path, "rb", buffering=_FOLLOW_BUFFER_SIZE) as file:
         yield LogFollower(file)
 
 
+async def afollow_log_file(file_path: pathlib.Path) -> typing.AsyncIterator[bytes]:
+    """Yield the content of the file, then data appended to it as it's written.
+
+    If the watchfiles module is available, the file's directory is watched
+    using the OS's change notifications (inotify, FSEvents, etc.), so the file
+    is mostly read after it changes. Otherwise, the file is polled
+    periodically.
+    """
+    with follow_log_file(file_path) as follower:
+        for chunk in follower.poll_chunks():
+            yield chunk
+        # Close the watcher explicitly, so that it stops watching as soon as
+        # this generator is closed rather than whenever it is garbage
+        # collected.
+        changes = _watch_file_async(file_path)
+        try:
+            async for _ in changes:
+                for chunk in follower.poll_chunks():
+                    yield chunk
+        finally:
+            await changes.aclose()
+
+
+async def _watch_file_async(
+    file_path: pathlib.Path,
+) -> typing.AsyncGenerator[None, None]:
+    try:
+        # pyre-fixme[21]: Could not find `watchfiles`.
+        import watchfiles
+    except ImportError:
+        # We don't strictly need watchfiles; fall back to polling.
+        while True:
+            await asyncio.sleep(_POLL_INTERVAL_SECONDS)
+            yield
+    else:
+        file_name = file_path.name
+
+        def is_followed_file(change: typing.Any, path: str) -> bool:
+            return os.path.basename(path) == file_name
+
+        # The watch is only set up once awatch is first iterated, after the
+        # caller has read the file's existing content. yield_on_timeout makes
+        # sure anything appended in between is read soon after the watch is
+        # set up, even if the file is never written again.
+        changes = watchfiles.awatch(
+            file_path.parent,
+            watch_filter=is_followed_file,
+            recursive=False,
+            rust_timeout=_WATCH_TIMEOUT_MILLISECONDS,
+            yield_on_timeout=True,
+        )
+        try:
+            async for _ in changes:
+                yield
+        finally:
+            await changes.aclose()
+
+
 class LogFollower:
     __file: _BinaryIO
 
@@ -56,7 +165,41 @@ class LogFollower:
         super().__init__()
         self.__file = file
 
+    def fileno(self) -> int:
+        return self.__file.fileno()
+
     def poll(self) -> bytes:
-        # pyre-fixme[29]: `Union[Callable[[Optional[int]], bytes], Callable[[int],
-        #  bytes]]` is not a function.
-        return self.__file.read()
+        return b"".join(self.poll_chunks())
+
+    def copy_to_fd(self, output_fd: int) -> None:
+        """Copy data appended to the file since the last poll to output_fd
+        using os.sendfile, without copying it through user space.
+
+        Raises OSError if the kernel can't sendfile to output_fd. Data copied
+        before the error is not copied again by a later poll.
+        """
+        input_fd = self.__file.fileno()
+        offset = self.__file.tell()
+        try:
+            while True:
+                count = os.fstat(input_fd).st_size - offset
+                if count <= 0:
+                    break
+                sent = os.sendfile(output_fd, input_fd, offset, count)
+                if sent == 0:
+                    break
+                offset += sent
+        finally:
+            self.__file.seek(offset)
+
+    def poll_chunks(self) -> typing.Iterator[bytes]:
+        """Yield data appended to the file since the last poll, in bounded
+        chunks, until EOF is reached.
+        """
+        while True:
+            # pyre-fixme[29]: `Union[Callable[[Optional[int]], bytes],
+            #  Callable[[int], bytes]]` is not a function.
+            chunk = self.__file.read(_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
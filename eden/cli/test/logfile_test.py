@@ -4,14 +4,18 @@
 # This software may be used and distributed according to the terms of the
 # GNU General Public License version 2.
 
+import asyncio
 import io
 import os
 import pathlib
 import subprocess
+import sys
+import types
 import typing
 import unittest
+import unittest.mock
 
-from eden.cli.logfile import follow_log_file, forward_log_file
+from eden.cli.logfile import afollow_log_file, follow_log_file, forward_log_file
 from eden.test_support.temporary_directory import TemporaryDirectoryMixin
 
 
@@ -39,6 +43,50 @@ class LogForwarderTest(_LogFileTestBase):
             forwarder.poll()
             self.assertEqual(output.getvalue(), b"hello world")
 
+    def test_forward_copies_large_file_content_after_poll(self) -> None:
+        data = bytes(range(256)) * 1024
+        path = self.make_empty_file()
+        path.write_bytes(data)
+        output = io.BytesIO()
+        with forward_log_file(path, output_file=output) as forwarder:
+            forwarder.poll()
+            self.assertEqual(output.getvalue(), data)
+            forwarder.poll()
+            self.assertEqual(output.getvalue(), data)
+
+    def test_forward_to_real_file_copies_concurrent_appends(self) -> None:
+        path = self.make_empty_file()
+        output_path = self.make_empty_file().with_name("output.txt")
+        with open(output_path, "wb") as output:
+            output.write(b"header:")
+            with forward_log_file(path, output_file=output) as forwarder:
+                with open(path, "ab") as file:
+                    file.write(b"hello")
+                    file.flush()
+                    forwarder.poll()
+                    self.assertEqual(output_path.read_bytes(), b"header:hello")
+
+                    file.write(b"world")
+                    file.flush()
+                    forwarder.poll()
+                    self.assertEqual(output_path.read_bytes(), b"header:helloworld")
+
+    def test_forward_to_appending_file_copies_concurrent_appends(self) -> None:
+        path = self.make_empty_file()
+        output_path = self.make_empty_file().with_name("output.txt")
+        with open(output_path, "ab") as output:
+            with forward_log_file(path, output_file=output) as forwarder:
+                with open(path, "ab") as file:
+                    file.write(b"hello")
+                    file.flush()
+                    forwarder.poll()
+                    self.assertEqual(output_path.read_bytes(), b"hello")
+
+                    file.write(b"world")
+                    file.flush()
+                    forwarder.poll()
+                    self.assertEqual(output_path.read_bytes(), b"helloworld")
+
     def test_forward_does_not_automatically_copy_concurrent_appends(self) -> None:
         path = self.make_empty_file()
         output = io.BytesIO()
@@ -132,3 +180,85 @@ class LogFollowerTest(_LogFileTestBase):
             subprocess.check_call(["sh", "-c", 'echo hello >>"${file}"'], env=env)
 
             self.assertEqual(follower.poll(), b"hello\n")
+
+
+class AsyncLogFollowerTest(_LogFileTestBase):
+    def follow(
+        self, path: pathlib.Path, append: typing.Optional[bytes]
+    ) -> typing.List[bytes]:
+        """Return the first two updates from afollow_log_file(path).
+
+        If append is not None, it is appended to the file after the first
+        update.
+        """
+
+        async def follow_async() -> typing.List[bytes]:
+            updates = []
+            follower = afollow_log_file(path)
+            try:
+                updates.append(await follower.__anext__())
+                if append is not None:
+                    with open(path, "ab") as file:
+                        file.write(append)
+                        file.flush()
+                updates.append(await follower.__anext__())
+            finally:
+                await follower.aclose()
+            return updates
+
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(asyncio.wait_for(follow_async(), 10))
+        finally:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+    def test_follow_yields_existing_content_then_concurrent_appends(self) -> None:
+        path = self.make_empty_file()
+        path.write_bytes(b"hello")
+        with unittest.mock.patch.dict(sys.modules, {"watchfiles": None}):
+            updates = self.follow(path, append=b"world")
+        self.assertEqual(updates, [b"hello", b"world"])
+
+    def test_follow_with_watchfiles_reads_appends_made_before_watch_is_set_up(
+        self,
+    ) -> None:
+        path = self.make_empty_file()
+        path.write_bytes(b"hello")
+        awatch_calls = []
+        awatch_closed = []
+
+        async def fake_awatch(
+            *paths: pathlib.Path, **kwargs: typing.Any
+        ) -> typing.AsyncIterator[typing.Set[typing.Any]]:
+            awatch_calls.append((paths, kwargs))
+            # Simulate a write which lands after the existing content was read
+            # but before the watch is set up, so no change is ever reported
+            # for it. Like the real awatch with yield_on_timeout=True, report
+            # no changes periodically.
+            with open(path, "ab") as file:
+                file.write(b"world")
+            try:
+                while True:
+                    await asyncio.sleep(0)
+                    yield set()
+            finally:
+                awatch_closed.append(True)
+
+        fake_watchfiles = types.ModuleType("watchfiles")
+        # pyre-fixme[16]: `ModuleType` has no attribute `awatch`.
+        fake_watchfiles.awatch = fake_awatch
+        with unittest.mock.patch.dict(sys.modules, {"watchfiles": fake_watchfiles}):
+            updates = self.follow(path, append=None)
+        self.assertEqual(updates, [b"hello", b"world"])
+        # Closing the follower stopped the watch.
+        self.assertEqual(awatch_closed, [True])
+
+        self.assertEqual(len(awatch_calls), 1)
+        paths, kwargs = awatch_calls[0]
+        self.assertEqual(paths, (path.parent,))
+        self.assertIs(kwargs["recursive"], False)
+        self.assertTrue(kwargs["yield_on_timeout"])
+        watch_filter = kwargs["watch_filter"]
+        self.assertTrue(watch_filter(None, str(path)))
+        self.assertFalse(watch_filter(None, str(path.with_name("other.txt"))))
@@ -284,6 +284,7 @@ EdenServiceHandler::EdenServiceHandler(
       std::make_tuple("getScmStatus", HistConfig{}),
       std::make_tuple("getScmStatusBetweenRevisions", HistConfig{}),
       std::make_tuple("getManifestEntry", HistConfig{}),
+      std::make_tuple("getManifestEntries", HistConfig{}),
       std::make_tuple("clearAndCompactLocalStore", HistConfig{}),
       std::make_tuple("unloadInodeForPath", HistConfig{}),
       std::make_tuple("flushStatsNow", HistConfig{20, 0, 1000}),
@@ -956,6 +957,22 @@ void EdenServiceHandler::getManifestEntry(
   }
 }
 
+void EdenServiceHandler::getManifestEntries(
+    std::map<std::string, ManifestEntry>& out,
+    std::unique_ptr<std::string> mountPoint,
+    std::unique_ptr<std::vector<std::string>> relativePaths) {
+  auto helper =
+      INSTRUMENT_THRIFT_CALL(DBG3, *mountPoint, toLogArg(*relativePaths));
+  auto mount = server_->getMount(*mountPoint);
+  for (const auto& relativePath : *relativePaths) {
+    auto mode =
+        isInManifestAsFile(mount.get(), RelativePathPiece{relativePath});
+    if (mode.has_value()) {
+      out[relativePath].mode = mode.value();
+    }
+  }
+}
+
 // TODO(mbolin): Make this a method of ObjectStore and make it Future-based.
 std::optional<mode_t> EdenServiceHandler::isInManifestAsFile(
     const EdenMount* mount,
@@ -124,6 +124,11 @@ class EdenServiceHandler : virtual public StreamingEdenServiceSvIf,
       std::unique_ptr<std::string> mountPoint,
       std::unique_ptr<std::string> relativePath) override;
 
+  void getManifestEntries(
+      std::map<std::string, ManifestEntry>& out,
+      std::unique_ptr<std::string> mountPoint,
+      std::unique_ptr<std::vector<std::string>> relativePaths) override;
+
   void async_tm_getScmStatusV2(
       std::unique_ptr<apache::thrift::HandlerCallback<
           std::unique_ptr<GetScmStatusResult>>> callback,
@@ -905,6 +905,20 @@ service EdenService extends fb303_core.BaseService {
     2: NoValueForKeyError noValueForKeyError
   )
 
+  /**
+   * Batch version of getManifestEntry().
+   *
+   * Returns a map from each of the relative paths which exists in the
+   * manifest (i.e., the current commit) to its ManifestEntry. Paths which
+   * do not exist in the manifest are omitted from the result.
+   *
+   * This is subject to change in the same way as getManifestEntry().
+   */
+  map<PathString, ManifestEntry> getManifestEntries(
+    1: PathString mountPoint
+    2: list<PathString> relativePaths
+  ) throws (1: EdenError ex)
+
   //////// Administrative APIs ////////
 
   /**
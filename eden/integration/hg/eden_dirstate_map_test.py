@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# Copyright (c) Facebook, Inc. and its affiliates.
+#
+# This software may be used and distributed according to the terms of the
+# GNU General Public License version 2.
+
+from textwrap import dedent
+
+from eden.integration.lib import hgrepo
+
+from .lib.hg_extension_test_base import EdenHgTestCase, hg_test
+
+
+# Prints the incrementally maintained nonnormal sets of the dirstate map `dmap`,
+# then the sets nonnormalentries() computes from scratch.
+_PRINT_NONNORMAL_SETS = dedent(
+    """\
+    ui.write("%r\\n" % ((sorted(dmap.nonnormalset), sorted(dmap.otherparentset)),))
+    ui.write("%r\\n" % (tuple(sorted(s) for s in dmap.nonnormalentries()),))
+    """
+)
+
+
+@hg_test
+# pyre-fixme[13]: Attribute `backing_repo` is never initialized.
+# pyre-fixme[13]: Attribute `backing_repo_name` is never initialized.
+# pyre-fixme[13]: Attribute `config_variant_name` is never initialized.
+# pyre-fixme[13]: Attribute `repo` is never initialized.
+class EdenDirstateMapTest(EdenHgTestCase):
+    """Tests for the in-memory state of eden_dirstate_map.
+
+    These run their steps inside a single `hg debugshell` process, since the
+    state under test does not outlive the process.
+    """
+
+    commit1: str
+    commit2: str
+    commit3: str
+
+    def populate_backing_repo(self, repo: hgrepo.HgRepository) -> None:
+        repo.write_file("a.txt", "a\n")
+        repo.write_file("b.txt", "b\n")
+        self.commit1 = repo.commit("Initial commit.")
+
+        repo.write_file("other.txt", "other\n")
+        self.commit2 = repo.commit("Add other.txt.")
+
+        repo.update(self.commit1)
+        repo.write_file("a.txt", "a2\n")
+        self.commit3 = repo.commit("Modify a.txt.")
+
+    def debugshell(self, code: str) -> str:
+        return self.hg("debugshell", "--command", code)
+
+    def assert_nonnormal_sets(self, output: str, expected: str) -> None:
+        maintained, computed = output.splitlines()
+        self.assertEqual(computed, maintained)
+        self.assertEqual(expected, maintained)
+
+    def test_nonnormal_sets_match_entries_after_dirstate_changes(self) -> None:
+        output = self.debugshell(
+            dedent(
+                """\
+                dmap = repo.dirstate._map
+                # Compute the sets before changing any entries.
+                dmap.nonnormalset, dmap.otherparentset
+                with repo.wlock():
+                    repo.dirstate.add("new1.txt")
+                    repo.dirstate.add("new2.txt")
+                    repo.dirstate.untrack("new2.txt")
+                    repo.dirstate.remove("b.txt")
+                """
+            )
+            + _PRINT_NONNORMAL_SETS
+        )
+        self.assert_nonnormal_sets(output, "(['b.txt', 'new1.txt'], [])")
+
+    def test_nonnormal_sets_match_entries_after_committing_merge(self) -> None:
+        self.hg("merge", "-r", self.commit2)
+        output = self.debugshell(
+            dedent(
+                """\
+                dmap = repo.dirstate._map
+                # Compute the sets while other.txt is from the other parent.
+                dmap.nonnormalset, dmap.otherparentset
+                repo.commit(text="Merge.")
+                """
+            )
+            + _PRINT_NONNORMAL_SETS
+        )
+        self.assert_nonnormal_sets(output, "([], [])")
+
+    def test_committed_file_is_tracked_before_dirstate_is_written(self) -> None:
+        self.write_file("new.txt", "new\n")
+        self.hg("add", "new.txt")
+        output = self.debugshell(
+            dedent(
+                """\
+                with repo.wlock(), repo.lock(), repo.transaction("test"):
+                    repo.commit(text="Add new.txt.")
+                    # The dirstate has the new parent, but Eden does not until
+                    # the dirstate is written when the transaction closes.
+                    ui.write("%s\\n" % repo.dirstate["new.txt"])
+                ui.write("%s\\n" % repo.dirstate["new.txt"])
+                """
+            )
+        )
+        self.assertEqual("n\nn\n", output)
+
+    def test_manifest_lookups_are_refreshed_when_parents_are_written(self) -> None:
+        output = self.debugshell(
+            dedent(
+                """\
+                dmap = repo.dirstate._map
+                # other.txt is not in the current parent. Looking it up caches
+                # that answer.
+                ui.write("%%s\\n" %% ("other.txt" in dmap))
+                with repo.wlock(), repo.dirstate.parentchange():
+                    repo.dirstate.setparents(repo["%s"].node())
+                # Writing the dirstate moved Eden to the new parent, which has
+                # other.txt.
+                ui.write("%%s\\n" %% ("other.txt" in dmap))
+                """
+                % self.commit2
+            )
+        )
+        self.assertEqual("False\nTrue\n", output)
+
+    def test_manifest_lookups_are_refreshed_after_checkout(self) -> None:
+        output = self.debugshell(
+            dedent(
+                """\
+                from edenscm.mercurial import hg
+                dmap = repo.dirstate._map
+                ui.write("%%s\\n" %% ("other.txt" in dmap))
+                with repo.wlock():
+                    hg.update(repo, repo["%s"].node(), quietempty=True)
+                    # Eden has checked out the new parent, but the dirstate
+                    # has not been written yet.
+                    ui.write("%%s\\n" %% ("other.txt" in dmap))
+                """
+                % self.commit2
+            )
+        )
+        self.assertEqual("False\nTrue\n", output)
+
+    def test_status_reports_changes_after_prefetching_manifest_entries(
+        self,
+    ) -> None:
+        self.write_file("a.txt", "changed\n")
+        self.write_file("untracked.txt", "untracked\n")
+        self.hg("rm", "b.txt")
+        self.assert_status({"a.txt": "M", "b.txt": "R", "untracked.txt": "?"})
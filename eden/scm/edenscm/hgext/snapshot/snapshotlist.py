@@ -59,21 +59,21 @@ class snapshotlist(object):
             self._check(repo)
 
     def _check(self, repo):
-        unfi = repo.unfiltered()
+        # Read the changelog directly rather than through changectx objects,
+        # as this runs every time the list is loaded.
+        cl = repo.unfiltered().changelog
         toremove = set()
         for snapshotnode in self.snapshots:
             binsnapshotnode = node.bin(snapshotnode)
-            if binsnapshotnode not in unfi:
+            if not cl.hasnode(binsnapshotnode):
                 raise error.Abort("invalid snapshot node: %s" % snapshotnode)
-            if "snapshotmetadataid" not in unfi[binsnapshotnode].extra():
+            if "snapshotmetadataid" not in cl.changelogrevision(binsnapshotnode).extra:
                 toremove.add(snapshotnode)
         if len(toremove) != 0:
             self.snapshots = [s for s in self.snapshots if s not in toremove]
 
     def _write(self, fp):
-        fp.write("%s\n" % FORMAT_VERSION)
-        for s in self.snapshots:
-            fp.write("%s\n" % (s,))
+        fp.write("".join("%s\n" % (s,) for s in [FORMAT_VERSION] + self.snapshots))
 
     def update(self, tr, addnodes=[], removenodes=[]):
         """transactionally update the list of snapshots
@@ -83,8 +83,8 @@ class snapshotlist(object):
         toadd = set(addnodes) - nodes
         toremove = set(removenodes) & nodes
         if len(toadd) != 0 or len(toremove) != 0:
-            self.snapshots = [s for s in self.snapshots if s not in toremove] + list(
-                sorted(addnodes)
+            self.snapshots = [s for s in self.snapshots if s not in toremove] + sorted(
+                toadd
             )
             tr.addfilegenerator("snapshots", ("snapshotlist",), self._write)
 
@@ -93,11 +93,12 @@ class snapshotlist(object):
         fm = ui.formatter("snapshots", opts)
         if len(self.snapshots) == 0:
             ui.status(_("no snapshots created\n"))
-        unfi = repo.unfiltered()
+        cl = repo.unfiltered().changelog
         for snapshotnode in self.snapshots:
-            ctx = unfi[snapshotnode]
-            message = ctx.description().split("\n")[0]
-            metadataid = ctx.extra()["snapshotmetadataid"]
+            binsnapshotnode = node.bin(snapshotnode)
+            changeset = cl.changelogrevision(binsnapshotnode)
+            message = changeset.description.split("\n")[0]
+            metadataid = changeset.extra["snapshotmetadataid"]
             if metadataid:
                 metadataid = metadataid[:12]
             else:
@@ -105,7 +106,7 @@ class snapshotlist(object):
 
             fm.startitem()
             # TODO(alexeyqu): print list of related files if --verbose
-            fm.write("revision", "%s", str(ctx))
+            fm.write("revision", "%s", node.short(binsnapshotnode))
             fm.condwrite(ui.verbose, "snapshotmetadataid", "% 15s", metadataid)
             fm.write("message", " %s", message)
             fm.plain("\n")
@@ -116,6 +116,26 @@ class EdenThriftClient(object):
         with self._get_client() as client:
             return client.getManifestEntry(self._eden_root, relativePath)
 
+    def getManifestEntries(self, relativePaths):
+        """Returns a dict of path -> ManifestEntry, omitting paths that are not
+        files in the manifest of the working copy parent."""
+        with self._get_client() as client:
+            try:
+                return client.getManifestEntries(self._eden_root, relativePaths)
+            except TApplicationException as e:
+                # Fallback to one getManifestEntry call per path in the case
+                # that this is running against an older version of edenfs in
+                # which getManifestEntries is not known
+                if e.type != TApplicationException.UNKNOWN_METHOD:
+                    raise
+            entries = {}
+            for path in relativePaths:
+                try:
+                    entries[path] = client.getManifestEntry(self._eden_root, path)
+                except NoValueForKeyError:
+                    pass
+            return entries
+
     def setHgParents(self, p1, p2, need_flush=True):
         if p2 == node.nullid:
             p2 = None
@@ -57,6 +57,19 @@ cliparser = bindings.cliparser
 
 unrecoverablewrite = registrar.command.unrecoverablewrite
 
+# signals turned into error.SignalInterrupt by _runcatch, if the platform
+# has them
+_catchablesignals = tuple(
+    getattr(signal, name)
+    for name in ("SIGBREAK", "SIGHUP", "SIGTERM")
+    if getattr(signal, name, None)
+)
+
+# config values for the --verbose/--debug/--quiet flags
+_boolconfigvalues = {False: "False", True: "True"}
+if sys.version_info[0] >= 3:
+    _boolconfigvalues = {k: v.encode("ascii") for k, v in _boolconfigvalues.items()}
+
 
 class request(object):
     def __init__(
@@ -135,16 +148,19 @@ def run(args=None, fin=None, fout=None, ferr=None):
     except error.StdioError as e:
         err = e
         status = -1
-    if util.safehasattr(req.ui, "fout"):
+    # req.ui may be missing if dispatch failed before creating it
+    fout = getattr(req.ui, "fout", None)
+    if fout is not None:
         try:
-            req.ui.fout.flush()
+            fout.flush()
         except IOError as e:
             err = e
             status = -1
-    if util.safehasattr(req.ui, "ferr"):
+    ferr = getattr(req.ui, "ferr", None)
+    if ferr is not None:
         if err is not None and err.errno != errno.EPIPE:
-            req.ui.ferr.write("abort: %s\n" % encoding.strtolocal(err.strerror))
-        req.ui.ferr.flush()
+            ferr.write("abort: %s\n" % encoding.strtolocal(err.strerror))
+        ferr.flush()
     sys.exit(status & 255)
 
 
@@ -339,15 +355,32 @@ def runchgserver():
 
 
 def _initstdio():
+    # setbinary is a no-op everywhere but Windows
+    if not pycompat.iswindows:
+        return
     for fp in (sys.stdin, sys.stdout, sys.stderr):
         util.setbinary(fp)
 
 
 def _getsimilar(symbols, value):
-    sim = lambda x: difflib.SequenceMatcher(None, value, x).ratio()
     # The cutoff for similarity here is pretty arbitrary. It should
     # probably be investigated and tweaked.
-    return [s for s in symbols if sim(s) > 0.6]
+    cutoff = 0.6
+    # Like difflib.get_close_matches, check the cheap upper bounds of ratio()
+    # first, so the full comparison only runs for plausible candidates.
+    # The length bound (same as real_quick_ratio) is checked before
+    # set_seq2, which has to index every candidate.
+    matcher = difflib.SequenceMatcher(None, value)
+    la = len(value)
+    similar = []
+    for s in symbols:
+        lb = len(s)
+        if la + lb and 2.0 * min(la, lb) / (la + lb) <= cutoff:
+            continue
+        matcher.set_seq2(s)
+        if matcher.quick_ratio() > cutoff and matcher.ratio() > cutoff:
+            similar.append(s)
+    return similar
 
 
 def _reportsimilar(write, similar):
@@ -418,7 +451,7 @@ def dispatch(req):
     def logatexit():
         ui = req.ui
         if ui.logmeasuredtimes:
-            ui.log("measuredtimes", **pycompat.strkwargs(ui._measuredtimes))
+            ui.log("measuredtimes", **ui._measuredtimes)
         if ui.metrics.stats:
             # Re-arrange metrics so "a_b_c", "a_b_d", "a_c" becomes
             # {'a': {'b': {'c': ..., 'd': ...}, 'c': ...}
@@ -522,16 +555,17 @@ def dispatch(req):
     return ret & retmask
 
 
-def _runcatch(req):
-    def catchterm(*args):
-        raise error.SignalInterrupt
+def _catchterm(*args):
+    raise error.SignalInterrupt
 
+
+def _runcatch(req):
     ui = req.ui
     try:
-        for name in "SIGBREAK", "SIGHUP", "SIGTERM":
-            num = getattr(signal, name, None)
-            if num:
-                signal.signal(num, catchterm)
+        for num in _catchablesignals:
+            # a chg worker inherits the handlers installed by the server
+            if signal.getsignal(num) is not _catchterm:
+                signal.signal(num, _catchterm)
     except ValueError:
         pass  # happens if called in a thread
 
@@ -586,8 +620,7 @@ def _runcatch(req):
                 len(req.args) != 4
                 or req.args[0] != "-R"
                 or req.args[1].startswith("--")
-                or req.args[2] != "serve"
-                or req.args[3] != "--stdio"
+                or req.args[2:] != ["serve", "--stdio"]
             ):
                 raise error.Abort(
                     _("potentially unsafe serve --stdio invocation: %r") % (req.args,)
@@ -821,20 +854,20 @@ def _parse(ui, args):
 
         # Only need to figure out the command name. Parse result is dropped.
         cmd, _args, a, entry, level = cmdutil.findsubcmd(replacement, commands.table)
-        c = list(entry[1])
+        cmdopts = entry[1]
     else:
         aliases = []
         cmd = None
         level = 0
-        c = []
-
-    # combine global options into local
-    c += commands.globalopts
-    # for o in commands.globalopts:
-    #    c.append((o[0], o[1], options[o[1]], o[3]))
+        cmdopts = []
 
     try:
-        flagdefs = [(flagdef[0], flagdef[1], flagdef[2]) for flagdef in c]
+        # combine global options into local
+        flagdefs = [
+            (flagdef[0], flagdef[1], flagdef[2])
+            for optlist in (cmdopts, commands.globalopts)
+            for flagdef in optlist
+        ]
 
         args, cmdoptions = cliparser.parsecommand(fullargs, flagdefs)
         args = args[level:]
@@ -847,21 +880,18 @@ def _parse(ui, args):
     except cliparser.OptionArgumentInvalid as e:
         raise error.Abort(e.args[0])
 
-    # separate global options back out
-    for (k, v) in cmdoptions.items():
-        if "-" in k:
-            orig = k
-            k = k.replace("-", "_")
-            cmdoptions[k] = v
-            del cmdoptions[orig]
+    # separate global options back out, in the same pass that normalizes
+    # option names
+    globalnames = set(o[1] for o in commands.globalopts)
+    parsedoptions = cmdoptions
+    cmdoptions = {}
+    for k, v in parsedoptions.items():
+        k = k.replace("-", "_")
+        if k in globalnames:
+            options[k] = v
         else:
             cmdoptions[k] = v
 
-    for o in commands.globalopts:
-        n = o[1]
-        options[n] = cmdoptions[n]
-        del cmdoptions[n]
-
     return (cmd, cmd and entry[0] or None, args, options, cmdoptions, aliases)
 
 
@@ -893,48 +923,21 @@ def _earlyparseopts(ui, args):
         raise error.Abort(_("cannot decode command line arguments"))
 
 
-def _joinfullargs(fullargs):
-    fullargs = [util.shellquote(arg) for arg in fullargs]
-    return " ".join(fullargs)
-
-
 def runcommand(lui, repo, cmd, fullargs, ui, options, d, cmdpats, cmdoptions):
+    hookkw = {"pats": cmdpats, "opts": cmdoptions}
     # run pre-hook, and abort if it fails
-    hook.hook(
-        lui,
-        repo,
-        "pre-%s" % cmd,
-        True,
-        args=_joinfullargs(fullargs),
-        pats=cmdpats,
-        opts=cmdoptions,
-    )
+    hook.hook(lui, repo, "pre-%s" % cmd, True, args=_formatargs(fullargs), **hookkw)
+    # the post and fail hooks get unquoted args (both run if the post hook fails)
+    hookkw["args"] = " ".join(fullargs)
     try:
         hintutil.loadhintconfig(lui)
         ui.log("jobid", jobid=encoding.environ.get("HG_JOB_ID", "unknown"))
         ret = _runcommand(ui, options, cmd, d)
         # run post-hook, passing command result
-        hook.hook(
-            lui,
-            repo,
-            "post-%s" % cmd,
-            False,
-            args=" ".join(fullargs),
-            result=ret,
-            pats=cmdpats,
-            opts=cmdoptions,
-        )
+        hook.hook(lui, repo, "post-%s" % cmd, False, result=ret, **hookkw)
     except Exception as e:
         # run failure hook and re-raise
-        hook.hook(
-            lui,
-            repo,
-            "fail-%s" % cmd,
-            False,
-            args=" ".join(fullargs),
-            pats=cmdpats,
-            opts=cmdoptions,
-        )
+        hook.hook(lui, repo, "fail-%s" % cmd, False, **hookkw)
         _log_exception(lui, e)
         raise
     return ret
@@ -1062,11 +1065,10 @@ def _dispatch(req):
         if options["time"]:
 
             def get_times():
+                # os.times() leaves the elapsed time as zero on Windows, so
+                # measure it with util.timer() everywhere
                 t = os.times()
-                if t[4] == 0.0:
-                    # Windows leaves this as zero, so use time.clock()
-                    t = (t[0], t[1], t[2], t[3], time.clock())
-                return t
+                return (t[0], t[1], t[2], t[3], util.timer())
 
             s = get_times()
 
@@ -1081,21 +1083,23 @@ def _dispatch(req):
         if options["profile"]:
             profiler.start()
 
+        # collect config overrides from the command line, so each ui only
+        # has to refresh its [ui] attributes once
+        overrides = []
         if options["verbose"] or options["debug"] or options["quiet"]:
             for opt in ("verbose", "debug", "quiet"):
-                val = str(bool(options[opt]))
-                if sys.version_info[0] >= 3:
-                    val = val.encode("ascii")
-                for ui_ in uis:
-                    ui_.setconfig("ui", opt, val, "--" + opt)
+                val = _boolconfigvalues[bool(options[opt])]
+                overrides.append(("ui", opt, val, "--" + opt))
 
         if options["traceback"]:
-            for ui_ in uis:
-                ui_.setconfig("ui", "traceback", "on", "--traceback")
+            overrides.append(("ui", "traceback", "on", "--traceback"))
 
         if options["noninteractive"]:
+            overrides.append(("ui", "interactive", "off", "-y"))
+
+        if overrides:
             for ui_ in uis:
-                ui_.setconfig("ui", "interactive", "off", "-y")
+                ui_.setconfigs(overrides)
 
         if cmdoptions.get("insecure", False):
             for ui_ in uis:
@@ -1119,7 +1123,6 @@ def _dispatch(req):
         elif not cmd:
             return commands.help_(ui)
 
-        msg = _formatargs(fullargs)
         with perftrace.trace("Main Python Command"):
             repo = None
             if func.cmdtemplate:
@@ -1153,10 +1156,12 @@ def _dispatch(req):
                             raise
                         if not func.optionalrepo:
                             if func.inferrepo and args and not path:
-                                # try to infer -R from command args
-                                repos = pycompat.maplist(cmdutil.findrepo, args)
-                                guess = repos[0]
-                                if guess and repos.count(guess) == len(repos):
+                                # try to infer -R from command args, stopping
+                                # at the first arg outside the guessed repo
+                                guess = cmdutil.findrepo(args[0])
+                                if guess and all(
+                                    cmdutil.findrepo(a) == guess for a in args[1:]
+                                ):
                                     req.args = ["--repository", guess] + fullargs
                                     req.earlyoptions["repository"] = guess
                                     return _dispatch(req)
@@ -1187,11 +1192,10 @@ def _dispatch(req):
             mdiff.init(ui)
             matchmod.init(ui)
 
-            ui.log("command", "%s\n", msg)
+            ui.log("command", "%s\n", _formatargs(fullargs))
             if repo:
                 repo.dirstate.loginfo(ui, "pre")
-            strcmdopt = pycompat.strkwargs(cmdoptions)
-            d = lambda: util.checksignature(func)(ui, *args, **strcmdopt)
+            d = lambda: util.checksignature(func)(ui, *args, **cmdoptions)
             ret = runcommand(
                 lui, repo, cmd, fullargs, ui, options, d, cmdpats, cmdoptions
             )
@@ -25,10 +25,14 @@ class eden_filesystem(filesystem.physicalfilesystem):
         ADDED = ScmFileStatus.ADDED
         IGNORED = ScmFileStatus.IGNORED
 
-        for path, code in edenstatus.iteritems():
-            if not match(path):
-                continue
+        changes = [(path, code) for path, code in edenstatus.iteritems() if match(path)]
 
+        # dirstate.status() looks up every changed path in the dirstate, which
+        # needs the manifest entry from Eden for paths that are not in the
+        # dirstate map. Fetch them all with one request.
+        self.dirstate._map.warmup(path for path, code in changes)
+
+        for path, code in changes:
             if code == MODIFIED or code == ADDED:
                 yield (path, True, False)
             elif code == REMOVED:
@@ -18,6 +18,13 @@ MERGE_STATE_OTHER_PARENT = eden_dirstate_serializer.MERGE_STATE_OTHER_PARENT
 DUMMY_MTIME = 0
 
 
+def _unsupported(name):
+    def unsupported(self, *args, **kwargs):
+        raise RuntimeError("Should not invoke %s on eden_dirstate_map!" % name)
+
+    return unsupported
+
+
 class eden_dirstate_map(dirstate.dirstatemap):
     def __init__(self, ui, opener, root, thrift_client, repo):
         # type(eden_dirstate_map, ui, opener, str, EdenThriftClient) -> None
@@ -26,13 +33,18 @@ class eden_dirstate_map(dirstate.dirstatemap):
         # the form: (status: char, mode: uint32, merge_state: int8).
         self._thrift_client = thrift_client
         self._repo = repo
+        # Modes of files fetched from the manifest of the working copy parent
+        # by __getitem__ and warmup(), or None for files not in the manifest.
+        self._manifestmodes = {}
 
     def write(self, file, now):  # override
         # type(eden_dirstate_map, IO[str], float)
         parents = self.parents()
 
-        # Remove all "clean" entries before writing. (It's possible we should
-        # never allow these to be inserted into self._map in the first place.)
+        # Remove all "clean" entries before writing. They can't be dropped any
+        # earlier: until setHgParents below, Eden still reports the manifest of
+        # the old parent, so _lookup needs them to answer for files marked
+        # normal against a new parent (e.g. by commit or rebase).
         to_remove = []
         for path, v in self._map.iteritems():
             if v[0] == "n" and v[2] == MERGE_STATE_NOT_APPLICABLE:
@@ -49,7 +61,10 @@ class eden_dirstate_map(dirstate.dirstatemap):
         # dirstate is updated.
         self._thrift_client.setHgParents(parents[0], parents[1], need_flush=False)
         self._dirtyparents = False
-        self.nonnormalset, self.otherparentset = self.nonnormalentries()
+        self.clearmanifestcache()
+        # Unlike the base class, nonnormalset and otherparentset do not need to
+        # be recomputed from the whole map here: _updatenonnormal keeps them
+        # matching nonnormalentries() as entries change.
 
     def read(self):  # override
         # ignore HG_PENDING because identity is used only for writing
@@ -76,41 +91,66 @@ class eden_dirstate_map(dirstate.dirstatemap):
         self._map = dirstate_tuples
         self.copymap = copymap
 
-    def iteritems(self):
-        raise RuntimeError("Should not invoke iteritems() on eden_dirstate_map!")
-
-    def __len__(self):
-        raise RuntimeError("Should not invoke __len__ on eden_dirstate_map!")
-
-    def __iter__(self):
-        raise RuntimeError("Should not invoke __iter__ on eden_dirstate_map!")
-
-    def keys(self):
-        raise RuntimeError("Should not invoke keys() on eden_dirstate_map!")
+    iteritems = _unsupported("iteritems()")
+    __len__ = _unsupported("__len__")
+    __iter__ = _unsupported("__iter__")
+    keys = _unsupported("keys()")
 
     def get(self, key, default=None):
-        try:
-            return self.__getitem__(key)
-        except KeyError:
-            return default
+        entry = self._lookup(key)
+        return default if entry is None else entry
 
     def __contains__(self, key):
-        return self.get(key) is not None
+        return self._lookup(key) is not None
 
     def __getitem__(self, filename):
         # type(str) -> parsers.dirstatetuple
+        entry = self._lookup(filename)
+        if entry is None:
+            raise KeyError(filename)
+        return entry
+
+    def _lookup(self, filename):
+        """Returns the entry for filename, or None if it is not tracked."""
+        # type(str) -> Optional[parsers.dirstatetuple]
         entry = self._map.get(filename)
         if entry is not None:
             status, mode, merge_state = entry
             return (status, mode, merge_state, DUMMY_MTIME)
 
         try:
-            # TODO: Consider fetching this from the commit context rather than
-            # querying Eden for this information.
-            manifest_entry = self._thrift_client.getManifestEntry(filename)
-            return ["n", manifest_entry.mode, MERGE_STATE_NOT_APPLICABLE, DUMMY_MTIME]
-        except thrift.NoValueForKeyError as e:
-            raise KeyError(e.key)
+            mode = self._manifestmodes[filename]
+        except KeyError:
+            try:
+                # TODO: Consider fetching this from the commit context rather
+                # than querying Eden for this information.
+                mode = self._thrift_client.getManifestEntry(filename).mode
+            except thrift.NoValueForKeyError:
+                mode = None
+            self._manifestmodes[filename] = mode
+
+        if mode is None:
+            return None
+        return ["n", mode, MERGE_STATE_NOT_APPLICABLE, DUMMY_MTIME]
+
+    def warmup(self, filenames):
+        """Fetch the manifest entries for filenames with a single request to
+        Eden, so that looking them up later does not need a request each."""
+        # type(Iterable[str]) -> None
+        missing = [
+            f for f in filenames if f not in self._map and f not in self._manifestmodes
+        ]
+        if not missing:
+            return
+        entries = self._thrift_client.getManifestEntries(missing)
+        for f in missing:
+            entry = entries.get(f)
+            self._manifestmodes[f] = entry.mode if entry is not None else None
+
+    def clearmanifestcache(self):
+        """Forget the manifest entries fetched so far. Call this whenever Eden
+        may have moved to a different working copy parent."""
+        self._manifestmodes.clear()
 
     def hastrackeddir(self, d):  # override
         # TODO(mbolin): Unclear whether it is safe to hardcode this to False.
@@ -120,6 +160,41 @@ class eden_dirstate_map(dirstate.dirstatemap):
         # TODO(mbolin): Unclear whether it is safe to hardcode this to False.
         return False
 
+    def addfile(self, f, oldstate, state, mode, size, mtime):  # override
+        super(eden_dirstate_map, self).addfile(f, oldstate, state, mode, size, mtime)
+        self._updatenonnormal(f)
+
+    def removefile(self, f, oldstate, size):  # override
+        super(eden_dirstate_map, self).removefile(f, oldstate, size)
+        self._updatenonnormal(f)
+
+    def untrackfile(self, f, oldstate):  # override
+        exists = super(eden_dirstate_map, self).untrackfile(f, oldstate)
+        self._updatenonnormal(f)
+        return exists
+
+    def _updatenonnormal(self, f):
+        """Update nonnormalset and otherparentset after the entry for f changed.
+
+        The base class adds files to these sets that nonnormalentries() would
+        not report (e.g. "n" entries with an mtime of -1), and never removes
+        files from otherparentset, so bring f's membership in line with
+        nonnormalentries().
+        """
+        entry = self._map.get(f)
+        if entry is not None and entry[0] != "n":
+            self.nonnormalset.add(f)
+        else:
+            self.nonnormalset.discard(f)
+        if (
+            entry is not None
+            and entry[0] == "n"
+            and entry[2] == MERGE_STATE_OTHER_PARENT
+        ):
+            self.otherparentset.add(f)
+        else:
+            self.otherparentset.discard(f)
+
     def _insert_tuple(self, filename, state, mode, size, mtime):  # override
         if size != MERGE_STATE_BOTH_PARENTS and size != MERGE_STATE_OTHER_PARENT:
             merge_state = MERGE_STATE_NOT_APPLICABLE
@@ -69,9 +69,7 @@ def update(
             # see if there are any conflicts that should prevent us from
             # attempting the update.
             if updatecheck == "noconflict":
-                conflicts = repo.dirstate.eden_client.checkout(
-                    destctx.node(), CheckoutMode.DRY_RUN
-                )
+                conflicts = _checkout(repo, destctx, CheckoutMode.DRY_RUN)
                 if conflicts:
                     actions = _determine_actions_for_conflicts(repo, p1ctx, conflicts)
                     _check_actions_and_raise_if_there_are_conflicts(actions)
@@ -91,9 +89,7 @@ def update(
             # but since this is a force update it will have already replaced
             # the conflicts with the destination file state, so we don't have
             # to do anything with them here.
-            conflicts = repo.dirstate.eden_client.checkout(
-                destctx.node(), CheckoutMode.FORCE
-            )
+            conflicts = _checkout(repo, destctx, CheckoutMode.FORCE)
             # We do still need to make sure to update the merge state though.
             # In the non-force code path the merge state is updated in
             # _handle_update_conflicts().
@@ -103,9 +99,7 @@ def update(
             stats = 0, 0, 0, 0
             actions = {}
         else:
-            conflicts = repo.dirstate.eden_client.checkout(
-                destctx.node(), CheckoutMode.NORMAL
-            )
+            conflicts = _checkout(repo, destctx, CheckoutMode.NORMAL)
             # TODO(mbolin): Add a warning if we did a DRY_RUN and the conflicts
             # we get here do not match. Only in the event of a race would we
             # expect them to differ from when the DRY_RUN was done (or if we
@@ -137,6 +131,15 @@ def update(
     return stats
 
 
+def _checkout(repo, destctx, mode):
+    conflicts = repo.dirstate.eden_client.checkout(destctx.node(), mode)
+    # The dirstate map caches manifest entries that Eden reported for the old
+    # parent. Eden has now (unless this was a dry run) moved to destctx, well
+    # before the dirstate is written with the new parents.
+    repo.dirstate._map.clearmanifestcache()
+    return conflicts
+
+
 def _handle_update_conflicts(repo, wctx, src, dest, labels, conflicts, force):
     # When resolving conflicts during an update operation, the working
     # directory (wctx) is one side of the merge, the destination commit (dest)
@@ -186,7 +186,9 @@ class profile(object):
     def __enter__(self):
         self._entered = True
         sections = sorted(
-            s for s in self._ui.configsections() if s.split(":", 1)[0] == "profiling"
+            s
+            for s in self._ui.configsections()
+            if s == "profiling" or s.startswith("profiling:")
         )
         for section in sections:
             if self._ui.configbool(section, "enabled"):
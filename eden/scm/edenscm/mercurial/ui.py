@@ -299,6 +299,9 @@ class ui(object):
     def setconfig(self, section, name, value, source=""):
         return self._uiconfig.setconfig(section, name, value, source)
 
+    def setconfigs(self, items):
+        return self._uiconfig.setconfigs(items)
+
     def configsource(self, section, name, untrusted=False):
         return self._uiconfig.configsource(section, name, untrusted)
 
@@ -127,6 +127,23 @@ class uiconfig(object):
             self.logmeasuredtimes = self.configbool("ui", "logmeasuredtimes")
 
     def setconfig(self, section, name, value, source=""):
+        self._setconfig(section, name, value, source)
+        self.fixconfig(section=section)
+
+    def setconfigs(self, items):
+        """set several (section, name, value, source) config items
+
+        Like calling setconfig for each item, but fixconfig only runs once
+        per affected section.
+        """
+        sections = set()
+        for section, name, value, source in items:
+            self._setconfig(section, name, value, source)
+            sections.add(section)
+        for section in sorted(sections):
+            self.fixconfig(section=section)
+
+    def _setconfig(self, section, name, value, source):
         if util.safehasattr(value, "__iter__"):
 
             def escape(v):
@@ -150,7 +167,6 @@ class uiconfig(object):
 
         self._pinnedconfigs.add((section, name))
         self._rcfg.set(section, name, value, source or "ui.setconfig")
-        self.fixconfig(section=section)
 
     def configsource(self, section, name, untrusted=False):
         sources = self._rcfg.sources(section, name)
@@ -283,6 +283,15 @@
   6f770bad8ca5   e654b3eb8739 another
   eae93e849afe   f37947cc08b7 snapshot
 
+# Adding a snapshot together with one already in the list does not duplicate it
+  $ hg debugshell -c "with repo.lock(), repo.transaction('snapshot') as tr: repo.snapshotlist.update(tr, removenodes=['$EMPTYOID'])"
+  $ hg debugshell -c "with repo.lock(), repo.transaction('snapshot') as tr: repo.snapshotlist.update(tr, addnodes=['$EMPTYOID', '$OID'])"
+  $ hg snapshot list --verbose
+  e6ce6b866bac   937ff3506fea snapshot
+  6f770bad8ca5   e654b3eb8739 another
+  eae93e849afe   f37947cc08b7 snapshot
+  bd8d77aecb3d           None first snapshot
+
 
 # Move back to BASEREV
   $ hg update -q --clean "$BASEREV" && rm bazfile